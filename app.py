@@ -1,14 +1,20 @@
 import streamlit as st
 import os
 import json
-import sqlite3
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
-from database import Database
+from database import Database, analysis_cache_key, word_count, json_loads
 from document_processor import DocumentProcessor
 from gemini_analyzer import GeminiAnalyzer
-from visualizations import create_visualizations
+from visualizations import (
+    create_visualizations,
+    create_document_metrics_chart,
+    create_advanced_analytics,
+)
 
 # Page configuration
 st.set_page_config(
@@ -28,6 +34,200 @@ def init_components():
 
 db, processor, analyzer = init_components()
 
+@st.cache_data(ttl=120, max_entries=4)
+def load_documents(unanalyzed_only=False):
+    """Cached document listing shared by the Analysis, History and Analytics pages.
+
+    Cleared explicitly whenever a document is stored, analyzed or deleted so
+    sidebar clicks between pages reuse the cached rows instead of re-reading
+    every row from SQLite on each rerun.
+    """
+    return db.list_documents(unanalyzed_only=unanalyzed_only)
+
+@st.cache_data(ttl=120, max_entries=16)
+def load_documents_view(search, order, limit=None, offset=0):
+    """Cached, SQL-filtered/sorted view used by the History page."""
+    return db.get_documents_view(search=search, order=order, limit=limit, offset=offset)
+
+@st.cache_data(ttl=120, max_entries=8)
+def count_documents(search):
+    return db.count_documents(search)
+
+@st.cache_data(ttl=120, max_entries=16)
+def load_search_results(search, order, limit=None, offset=0):
+    """Cached FTS5 search over filename and content."""
+    return db.search_documents(search, order=order, limit=limit, offset=offset)
+
+@st.cache_data(ttl=120, max_entries=8)
+def count_search_results(search):
+    return db.count_search_results(search)
+
+@st.cache_data(ttl=120)
+def load_dashboard_summary():
+    return db.get_dashboard_summary()
+
+@st.cache_data(ttl=300, max_entries=128)
+def parse_analysis(analysis_json):
+    """Memoized parse of a row's analysis JSON.
+
+    The list queries already extract status fields in SQL, so the full
+    document is only parsed here, on demand, when a details block is
+    open — and at most once per distinct payload across reruns.
+    """
+    return json_loads(analysis_json)
+
+def documents_figure_key(documents):
+    """Cache key for figures built from a document set.
+
+    id + upload_date + analyzed per row invalidates on upload, delete
+    and re-analysis without hashing any document content.
+    """
+    return tuple((doc.id, doc.upload_date, doc.analyzed) for doc in documents)
+
+@st.cache_data(ttl=300)
+def load_visualizations(doc_key):
+    """Cached dashboard figures, keyed by documents_figure_key."""
+    return create_visualizations(load_documents())
+
+@st.cache_data(ttl=300)
+def load_metrics_chart(doc_key):
+    return create_document_metrics_chart(load_documents())
+
+@st.cache_data(ttl=300)
+def load_advanced_analytics(doc_key):
+    return create_advanced_analytics(load_documents())
+
+@st.cache_resource
+def get_analysis_executor():
+    """Process-wide worker pool for Gemini analysis jobs."""
+    return ThreadPoolExecutor(max_workers=4)
+
+def run_analysis_job(doc_ids, analysis_type, complexity_level, advanced_options):
+    """Run an analysis batch on the background executor.
+
+    Executes off the Streamlit script thread so the session stays
+    responsive while Gemini works; must not touch any st.* UI calls.
+    Returns one result dict per document id.
+    """
+    contents = [db.get_document_content(doc_id) for doc_id in doc_ids]
+
+    # Serve identical re-analyses from the persistent cache
+    cache_keys = [
+        analysis_cache_key(content, analysis_type, complexity_level)
+        for content in contents
+    ]
+    results = [db.get_cached_analysis(key) for key in cache_keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    # Perform AI analysis on cache misses; multiple documents run
+    # concurrently, and a single document still gathers its analysis,
+    # quick summary and (optionally) entities in one concurrent batch
+    if len(missing) == 1:
+        fresh = [asyncio.run(analyzer.analyze_all(
+            contents[missing[0]],
+            analysis_type,
+            complexity_level,
+            include_entities=advanced_options.get("entities", False)
+        ))]
+    elif missing:
+        fresh = asyncio.run(analyzer.analyze_documents_async(
+            [contents[i] for i in missing],
+            analysis_type,
+            complexity_level
+        ))
+    else:
+        fresh = []
+
+    for i, analysis_result in zip(missing, fresh):
+        results[i] = analysis_result
+        if "error" not in analysis_result:
+            db.cache_analysis(cache_keys[i], analysis_result)
+
+    # Mark as analyzed and update in database
+    analysis_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for doc_id, analysis_result in zip(doc_ids, results):
+        analysis_result["analyzed"] = True
+        analysis_result["analysis_date"] = analysis_timestamp
+        analysis_result["analysis_type"] = analysis_type
+        analysis_result["complexity_level"] = complexity_level
+        analysis_result["advanced_options"] = advanced_options
+
+        # Flag dropped saves so the results view can report them; the
+        # marker only exists on results that never reached the database
+        if not db.save_analysis(doc_id, analysis_result):
+            analysis_result["save_failed"] = True
+
+    return results
+
+@st.fragment
+def render_document_row(doc):
+    """One History-page document expander.
+
+    As a fragment, the View/Hide Details buttons rerun only this row
+    instead of rebuilding every widget on the page. Delete still triggers
+    a full rerun since the listing itself changes.
+    """
+    doc_id = doc.id
+
+    with st.expander(f"📄 {doc.filename} - {doc.upload_date}"):
+        col1, col2, col3 = st.columns([2, 1, 1])
+
+        with col1:
+            st.write(f"**File Type:** {doc.file_type}")
+            st.write(f"**Upload Date:** {doc.upload_date}")
+            st.write(f"**Content Length:** {doc.char_count} characters")
+
+        with col2:
+            if st.button(f"👁️ View Details", key=f"view_{doc_id}"):
+                st.session_state[f"show_details_{doc_id}"] = True
+
+        with col3:
+            if st.button(f"🗑️ Delete", key=f"delete_{doc_id}", type="secondary"):
+                if db.delete_document(doc_id):
+                    invalidate_document_caches()
+                    st.success("Document deleted successfully!")
+                    st.rerun()
+                else:
+                    st.error("Failed to delete document")
+
+        # Show details if requested
+        if st.session_state.get(f"show_details_{doc_id}", False):
+            st.markdown("**Analysis Results:**")
+
+            if doc.analysis:
+                try:
+                    analysis_data = parse_analysis(doc.analysis)
+
+                    if "summary" in analysis_data:
+                        st.write("**Summary:**")
+                        st.write(analysis_data["summary"])
+
+                    if "key_points" in analysis_data:
+                        st.write("**Key Points:**")
+                        for point in analysis_data["key_points"]:
+                            st.write(f"- {point}")
+
+                except json.JSONDecodeError:
+                    st.write("Analysis data is not in valid format")
+            else:
+                st.write("No analysis data available")
+
+            if st.button(f"Hide Details", key=f"hide_{doc_id}"):
+                st.session_state[f"show_details_{doc_id}"] = False
+                st.rerun(scope="fragment")
+
+def invalidate_document_caches():
+    """Drop all cached document listings after any write."""
+    load_documents.clear()
+    load_documents_view.clear()
+    count_documents.clear()
+    load_search_results.clear()
+    count_search_results.clear()
+    load_dashboard_summary.clear()
+    load_visualizations.clear()
+    load_metrics_chart.clear()
+    load_advanced_analytics.clear()
+
 # Main title
 st.title("⚖️ Legal Document Analysis Platform")
 st.markdown("*Powered by Google Gemini AI*")
@@ -43,61 +243,76 @@ if page == "Document Upload":
     st.header("📄 Document Upload")
     
     # File upload
-    uploaded_file = st.file_uploader(
-        "Choose a legal document",
+    uploaded_files = st.file_uploader(
+        "Choose legal documents",
         type=["pdf", "docx", "txt"],
+        accept_multiple_files=True,
         help="Upload PDF, DOCX, or TXT files"
     )
-    
-    if uploaded_file is not None:
+
+    if uploaded_files:
         # Display file info
-        st.success(f"File uploaded: {uploaded_file.name} ({uploaded_file.size} bytes)")
-        
-        # Extract and store document
-        with st.spinner("Processing document..."):
+        total_bytes = sum(f.size for f in uploaded_files)
+        st.success(f"{len(uploaded_files)} file(s) uploaded ({total_bytes} bytes)")
+
+        # Extract and store documents
+        with st.spinner("Processing documents..."):
             try:
-                # Extract text from document
-                extracted_text = processor.extract_text(uploaded_file)
-                
-                if not extracted_text.strip():
-                    st.error("Could not extract text from the document. Please check the file format.")
-                else:
-                    # Store document without analysis initially
-                    doc_id = db.store_document(
-                        filename=uploaded_file.name,
-                        content=extracted_text,
-                        analysis={"status": "uploaded", "analyzed": False},
-                        file_type=uploaded_file.type
-                    )
-                    
-                    st.success(f"✅ Document uploaded and stored with ID: {doc_id}")
-                    st.info("📋 Document is ready for analysis. Go to 'Document Analysis' section to analyze it.")
-                    
-                    # Show document preview
-                    st.subheader("📖 Document Preview")
-                    st.text_area("Content Preview (first 500 characters):", 
-                               value=extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text,
-                               height=200, disabled=True)
-                    
-                    # Show document metrics
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Word Count", len(extracted_text.split()))
-                    with col2:
-                        st.metric("Character Count", len(extracted_text))
-                    with col3:
-                        st.metric("Reading Time", f"{len(extracted_text.split()) // 200 + 1} min")
-                        
+                records = []
+                for uploaded_file in uploaded_files:
+                    extracted_text = processor.extract_text(uploaded_file)
+
+                    if not extracted_text.strip():
+                        st.error(f"Could not extract text from {uploaded_file.name}. Please check the file format.")
+                    else:
+                        # Store documents without analysis initially
+                        records.append((
+                            uploaded_file.name,
+                            extracted_text,
+                            {"status": "uploaded", "analyzed": False},
+                            uploaded_file.type
+                        ))
+
+                if records:
+                    # One transaction for the whole batch; an empty id list
+                    # means the insert failed, not that zero files succeeded
+                    doc_ids = db.store_documents(records)
+                    if not doc_ids:
+                        st.error("❌ Failed to store the uploaded document(s) in the database. Please try again.")
+                    else:
+                        invalidate_document_caches()
+
+                        st.success(f"✅ {len(doc_ids)} document(s) uploaded and stored (IDs: {', '.join(map(str, doc_ids))})")
+                        st.info("📋 Documents are ready for analysis. Go to 'Document Analysis' section to analyze them.")
+
+                        # Show a preview for single-file uploads
+                        if len(records) == 1:
+                            preview_word_count = word_count(records[0][1])
+                            preview_char_count = len(records[0][1])
+
+                            # Read just the preview bytes back via blob I/O
+                            # instead of keeping the full text around
+                            st.subheader("📖 Document Preview")
+                            st.text_area("Content Preview (first 500 characters):",
+                                       value=db.get_content_preview(doc_ids[0]),
+                                       height=200, disabled=True)
+
+                            # Show document metrics
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                st.metric("Word Count", preview_word_count)
+                            with col2:
+                                st.metric("Character Count", preview_char_count)
+                            with col3:
+                                st.metric("Reading Time", f"{preview_word_count // 200 + 1} min")
+
             except Exception as e:
-                st.error(f"Error processing document: {str(e)}")
+                st.error(f"Error processing documents: {str(e)}")
 
 elif page == "Document Analysis":
     st.header("🔍 Document Analysis")
     
-    # Get all documents
-    all_documents = db.get_all_documents()
-    
-    if not all_documents:
+    if not count_documents(None):
         st.info("📭 No documents available for analysis. Please upload documents first.")
         st.markdown("[Go to Document Upload →]()", unsafe_allow_html=True)
     else:
@@ -111,22 +326,9 @@ elif page == "Document Analysis":
         
         # Filter documents based on mode
         if analysis_mode.startswith("🆕"):
-            # Filter for documents that haven't been analyzed yet
-            available_docs = []
-            for doc in all_documents:
-                doc_id, filename, file_type, upload_date, content, analysis = doc
-                if analysis:
-                    try:
-                        analysis_data = json.loads(analysis)
-                        # Check if document has been analyzed (default to False for new uploads)
-                        if not analysis_data.get("analyzed", False):
-                            available_docs.append(doc)
-                    except json.JSONDecodeError:
-                        # If analysis data is corrupted, consider it unanalyzed
-                        available_docs.append(doc)
-                else:
-                    # No analysis data means it hasn't been analyzed
-                    available_docs.append(doc)
+            # Partial-index-backed query for documents whose analyzed flag is
+            # not set (corrupted analysis data also counts as unanalyzed)
+            available_docs = load_documents(unanalyzed_only=True)
             
             if not available_docs:
                 st.info("📭 No unanalyzed documents available. All documents have been analyzed.")
@@ -135,54 +337,43 @@ elif page == "Document Analysis":
                 st.write(f"📊 {len(available_docs)} document(s) ready for analysis")
         else:
             # Show all documents for re-analysis
-            available_docs = all_documents
+            available_docs = load_documents()
             st.write(f"📊 {len(available_docs)} document(s) available for re-analysis")
         
         if available_docs:
-            # Document selection
-            doc_options = []
-            for doc in available_docs:
-                doc_id, filename, file_type, upload_date, content, analysis = doc
-                
-                # Get analysis status for display
-                status_indicator = ""
-                if analysis:
-                    try:
-                        analysis_data = json.loads(analysis)
-                        if analysis_data.get("analyzed", False):
-                            status_indicator = " ✅"
-                        else:
-                            status_indicator = " ⏳"
-                    except json.JSONDecodeError:
-                        status_indicator = " ❌"
-                else:
-                    status_indicator = " 📝"
-                
-                doc_options.append((f"{filename}{status_indicator} (ID: {doc_id}) - {upload_date[:10]}", doc_id))
-            
-            selected_doc_label = st.selectbox(
-                "Choose a document to analyze:",
-                options=[option[0] for option in doc_options],
-                help="✅ = Analyzed, ⏳ = Pending, ❌ = Error, 📝 = New"
+            # Document selection: labels consume the SQL-extracted analyzed
+            # column, and selections resolve by id without rescanning the list
+            status_icons = {1: " ✅", 0: " ⏳", -1: " ❌", None: " 📝"}
+            docs_by_id = {doc.id: doc for doc in available_docs}
+            label_to_id = {
+                f"{doc.filename}{status_icons.get(doc.analyzed, ' ⏳')} (ID: {doc.id}) - {doc.upload_date[:10]}": doc.id
+                for doc in available_docs
+            }
+
+            selected_doc_labels = st.multiselect(
+                "Choose document(s) to analyze:",
+                options=list(label_to_id),
+                help="✅ = Analyzed, ⏳ = Pending, ❌ = Error, 📝 = New. Multiple documents are analyzed concurrently."
             )
-            
-            if selected_doc_label:
-                # Find selected document
-                selected_doc_id = next(option[1] for option in doc_options if option[0] == selected_doc_label)
-                selected_doc = next(doc for doc in available_docs if doc[0] == selected_doc_id)
-                
-                doc_id, filename, file_type, upload_date, content, analysis = selected_doc
-                
-                # Show document info
-                st.subheader(f"📄 {filename}")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("File Type", file_type.split('/')[-1].upper())
-                with col2:
-                    st.metric("Upload Date", upload_date[:10])
-                with col3:
-                    st.metric("Word Count", len(content.split()))
-                
+
+            if selected_doc_labels:
+                selected_docs = [docs_by_id[label_to_id[label]] for label in selected_doc_labels]
+
+                if len(selected_docs) == 1:
+                    doc = selected_docs[0]
+
+                    # Show document info
+                    st.subheader(f"📄 {doc.filename}")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("File Type", doc.file_type.split('/')[-1].upper())
+                    with col2:
+                        st.metric("Upload Date", doc.upload_date[:10])
+                    with col3:
+                        st.metric("Word Count", doc.word_count)
+                else:
+                    st.subheader(f"📄 {len(selected_docs)} documents selected")
+
                 # Analysis options
                 st.subheader("⚙️ Analysis Configuration")
                 col1, col2 = st.columns(2)
@@ -211,214 +402,213 @@ elif page == "Document Analysis":
                 with col3:
                     include_timeline = st.checkbox("Timeline Analysis", value=False)
                 
-                # Analyze button
-                if st.button("🔍 Analyze Document", type="primary"):
-                    with st.spinner("Analyzing document with Gemini AI..."):
+                # Analyze button submits a background job so the session
+                # stays responsive while Gemini works
+                if st.button("🔍 Analyze Document(s)", type="primary"):
+                    job = get_analysis_executor().submit(
+                        run_analysis_job,
+                        [doc.id for doc in selected_docs],
+                        analysis_type,
+                        complexity_level,
+                        {
+                            "entities": include_entities,
+                            "risks": include_risks,
+                            "timeline": include_timeline
+                        }
+                    )
+                    st.session_state["analysis_job"] = (job, selected_docs)
+                    st.session_state.pop("analysis_results", None)
+                    st.rerun()
+
+                # Poll the running job, if any
+                job_entry = st.session_state.get("analysis_job")
+                if job_entry is not None:
+                    job, job_docs = job_entry
+                    if job.done():
+                        del st.session_state["analysis_job"]
                         try:
-                            # Perform AI analysis
-                            analysis_result = analyzer.analyze_document(
-                                content, 
-                                analysis_type, 
-                                complexity_level
-                            )
-                            
-                            # Mark as analyzed and update in database
-                            analysis_result["analyzed"] = True
-                            analysis_result["analysis_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            analysis_result["analysis_type"] = analysis_type
-                            analysis_result["complexity_level"] = complexity_level
-                            analysis_result["advanced_options"] = {
-                                "entities": include_entities,
-                                "risks": include_risks,
-                                "timeline": include_timeline
-                            }
-                            
-                            # Update the document with analysis
-                            with sqlite3.connect(db.db_path) as conn:
-                                cursor = conn.cursor()
-                                cursor.execute(
-                                    "UPDATE documents SET analysis = ? WHERE id = ?",
-                                    (json.dumps(analysis_result), doc_id)
-                                )
-                                conn.commit()
-                            
-                            # Display results
-                            st.subheader("📊 Analysis Results")
-                            
-                            # Create tabs for different sections
-                            tab1, tab2, tab3, tab4 = st.tabs(["Summary", "Key Points", "Insights", "Metrics"])
-                            
-                            with tab1:
-                                st.markdown("### 📝 Document Summary")
-                                st.write(analysis_result.get("summary", "No summary available"))
-                            
-                            with tab2:
-                                st.markdown("### 🔑 Key Points")
-                                key_points = analysis_result.get("key_points", [])
-                                if key_points:
-                                    for i, point in enumerate(key_points, 1):
-                                        st.write(f"{i}. {point}")
-                                else:
-                                    st.write("No key points extracted")
-                            
-                            with tab3:
-                                st.markdown("### 💡 AI Insights")
-                                insights = analysis_result.get("insights", {})
-                                
-                                if "complexity_score" in insights:
-                                    st.metric("Complexity Score", f"{insights['complexity_score']}/10")
-                                
-                                if "sentiment" in insights:
-                                    st.metric("Document Tone", insights["sentiment"])
-                                
-                                if "legal_areas" in insights:
-                                    st.write("**Legal Areas Identified:**")
-                                    for area in insights["legal_areas"]:
-                                        st.write(f"- {area}")
-                            
-                            with tab4:
-                                st.markdown("### 📈 Document Metrics")
-                                
-                                # Create metrics
-                                metrics_data = {
-                                    "Word Count": len(content.split()),
-                                    "Character Count": len(content),
-                                    "Estimated Reading Time": f"{len(content.split()) // 200 + 1} min",
-                                    "Complexity Level": analysis_result.get("insights", {}).get("complexity_level", "Unknown")
-                                }
-                                
-                                for metric, value in metrics_data.items():
-                                    st.metric(metric, value)
-                            
-                            st.success(f"✅ Document analysis completed and saved!")
-                            
+                            st.session_state["analysis_results"] = (job_docs, job.result())
+                            invalidate_document_caches()
                         except Exception as e:
                             st.error(f"Error during analysis: {str(e)}")
                             st.info("Please check your internet connection and API configuration.")
+                    else:
+                        st.info(f"⏳ Analyzing {len(job_docs)} document(s) with Gemini AI in the background...")
+                        time.sleep(1)
+                        st.rerun()
+
+                # Show the most recent results
+                if "analysis_results" in st.session_state:
+                    result_docs, results = st.session_state["analysis_results"]
+
+                    if len(result_docs) == 1:
+                        analysis_result = results[0]
+                        result_word_count = result_docs[0].word_count
+                        result_char_count = result_docs[0].char_count
+
+                        # Display results
+                        st.subheader("📊 Analysis Results")
+
+                        # Create tabs for different sections
+                        tab1, tab2, tab3, tab4 = st.tabs(["Summary", "Key Points", "Insights", "Metrics"])
+
+                        with tab1:
+                            st.markdown("### 📝 Document Summary")
+                            st.write(analysis_result.get("summary", "No summary available"))
+
+                        with tab2:
+                            st.markdown("### 🔑 Key Points")
+                            key_points = analysis_result.get("key_points", [])
+                            if key_points:
+                                for i, point in enumerate(key_points, 1):
+                                    st.write(f"{i}. {point}")
+                            else:
+                                st.write("No key points extracted")
+
+                        with tab3:
+                            st.markdown("### 💡 AI Insights")
+                            insights = analysis_result.get("insights", {})
+
+                            if "complexity_score" in insights:
+                                st.metric("Complexity Score", f"{insights['complexity_score']}/10")
+
+                            if "sentiment" in insights:
+                                st.metric("Document Tone", insights["sentiment"])
+
+                            if "legal_areas" in insights:
+                                st.write("**Legal Areas Identified:**")
+                                for area in insights["legal_areas"]:
+                                    st.write(f"- {area}")
+
+                        with tab4:
+                            st.markdown("### 📈 Document Metrics")
+
+                            # Create metrics
+                            metrics_data = {
+                                "Word Count": result_word_count,
+                                "Character Count": result_char_count,
+                                "Estimated Reading Time": f"{result_word_count // 200 + 1} min",
+                                "Complexity Level": analysis_result.get("insights", {}).get("complexity_level", "Unknown")
+                            }
+
+                            for metric, value in metrics_data.items():
+                                st.metric(metric, value)
+                    else:
+                        # Per-document summaries for batch analysis
+                        st.subheader("📊 Analysis Results")
+                        for doc, analysis_result in zip(result_docs, results):
+                            with st.expander(f"📄 {doc.filename}"):
+                                if "error" in analysis_result:
+                                    st.error(f"Analysis failed: {analysis_result['error']}")
+                                else:
+                                    st.write(analysis_result.get("summary", "No summary available"))
+
+                    unsaved = [
+                        doc.filename
+                        for doc, analysis_result in zip(result_docs, results)
+                        if analysis_result.get("save_failed")
+                    ]
+                    if unsaved:
+                        st.error(f"❌ Analysis could not be saved for: {', '.join(unsaved)}. "
+                                 "The results above are not stored in the database.")
+                    saved_count = len(result_docs) - len(unsaved)
+                    if saved_count:
+                        st.success(f"✅ {saved_count} document analysis(es) completed and saved!")
 
 elif page == "Document History":
     st.header("📚 Document History")
-    
-    # Fetch all documents
-    documents = db.get_all_documents()
-    
-    if not documents:
+
+    PAGE_SIZE = 25
+    total_documents = count_documents(None)
+
+    if not total_documents:
         st.info("📭 No documents found. Upload and analyze documents to see them here.")
     else:
-        st.write(f"Total documents: {len(documents)}")
-        
+        st.write(f"Total documents: {total_documents}")
+
         # Search and filter
         col1, col2 = st.columns([2, 1])
         with col1:
-            search_term = st.text_input("🔍 Search documents by filename:")
+            search_term = st.text_input(
+                "🔍 Search documents by filename or content:",
+                help="Terms of 3+ characters also search inside document text."
+            ).strip()
         with col2:
             sort_option = st.selectbox("Sort by:", ["Date (Newest)", "Date (Oldest)", "Filename"])
-        
-        # Filter documents
-        filtered_docs = documents
-        if search_term:
-            filtered_docs = [doc for doc in documents if search_term.lower() in doc[1].lower()]
-        
-        # Sort documents
-        if sort_option == "Date (Newest)":
-            filtered_docs.sort(key=lambda x: x[5], reverse=True)
-        elif sort_option == "Date (Oldest)":
-            filtered_docs.sort(key=lambda x: x[5])
+
+        # Filter and sort inside SQLite. Terms of 3+ characters go through
+        # the FTS5 index (filename and content); shorter terms fall back to
+        # the filename LIKE filter.
+        order_keys = {
+            "Date (Newest)": "date_desc",
+            "Date (Oldest)": "date_asc",
+            "Filename": "filename"
+        }
+        use_fts = len(search_term) >= 3
+        if use_fts:
+            matching = count_search_results(search_term)
         else:
-            filtered_docs.sort(key=lambda x: x[1])
-        
+            matching = count_documents(search_term or None)
+        total_pages = max(1, (matching + PAGE_SIZE - 1) // PAGE_SIZE)
+        page_num = st.number_input(
+            f"Page (of {total_pages}):",
+            min_value=1, max_value=total_pages, value=1, step=1
+        )
+        # Only the current page's rows are fetched and rendered
+        if use_fts:
+            filtered_docs = load_search_results(
+                search_term, order_keys[sort_option],
+                limit=PAGE_SIZE, offset=(page_num - 1) * PAGE_SIZE
+            )
+        else:
+            filtered_docs = load_documents_view(
+                search_term or None, order_keys[sort_option],
+                limit=PAGE_SIZE, offset=(page_num - 1) * PAGE_SIZE
+            )
+
         # Display documents
         for doc in filtered_docs:
-            doc_id, filename, file_type, upload_date, content, analysis = doc
-            
-            with st.expander(f"📄 {filename} - {upload_date}"):
-                col1, col2, col3 = st.columns([2, 1, 1])
-                
-                with col1:
-                    st.write(f"**File Type:** {file_type}")
-                    st.write(f"**Upload Date:** {upload_date}")
-                    st.write(f"**Content Length:** {len(content)} characters")
-                
-                with col2:
-                    if st.button(f"👁️ View Details", key=f"view_{doc_id}"):
-                        st.session_state[f"show_details_{doc_id}"] = True
-                
-                with col3:
-                    if st.button(f"🗑️ Delete", key=f"delete_{doc_id}", type="secondary"):
-                        if db.delete_document(doc_id):
-                            st.success("Document deleted successfully!")
-                            st.rerun()
-                        else:
-                            st.error("Failed to delete document")
-                
-                # Show details if requested
-                if st.session_state.get(f"show_details_{doc_id}", False):
-                    st.markdown("**Analysis Results:**")
-                    
-                    if analysis:
-                        import json
-                        try:
-                            analysis_data = json.loads(analysis)
-                            
-                            if "summary" in analysis_data:
-                                st.write("**Summary:**")
-                                st.write(analysis_data["summary"])
-                            
-                            if "key_points" in analysis_data:
-                                st.write("**Key Points:**")
-                                for point in analysis_data["key_points"]:
-                                    st.write(f"- {point}")
-                                    
-                        except json.JSONDecodeError:
-                            st.write("Analysis data is not in valid format")
-                    else:
-                        st.write("No analysis data available")
-                    
-                    if st.button(f"Hide Details", key=f"hide_{doc_id}"):
-                        st.session_state[f"show_details_{doc_id}"] = False
-                        st.rerun()
-        
+            render_document_row(doc)
+
         # Recent Activity Section
         st.subheader("🕒 Recent Activity")
-        recent_docs = sorted(documents, key=lambda x: x[5], reverse=True)[:5]
+        recent_docs = load_documents_view(None, "date_desc", limit=5)
         
         if recent_docs:
             for doc in recent_docs:
-                doc_id, filename, file_type, upload_date, content, analysis = doc
-                
-                # Parse analysis status
-                analysis_status = "Not Analyzed"
-                analysis_date = "N/A"
-                if analysis:
-                    try:
-                        analysis_data = json.loads(analysis)
-                        if analysis_data.get("analyzed", False):
-                            analysis_status = "✅ Analyzed"
-                            analysis_date = analysis_data.get("analysis_date", "Unknown")
-                        else:
-                            analysis_status = "⏳ Pending Analysis"
-                    except json.JSONDecodeError:
-                        analysis_status = "❌ Analysis Error"
-                
+                # Status comes from the SQL-extracted columns
+                if doc.analyzed == 1:
+                    analysis_status = "✅ Analyzed"
+                    analysis_date = doc.analysis_date or "Unknown"
+                elif doc.analyzed == 0:
+                    analysis_status = "⏳ Pending Analysis"
+                    analysis_date = "N/A"
+                elif doc.analyzed == -1:
+                    analysis_status = "❌ Analysis Error"
+                    analysis_date = "N/A"
+                else:
+                    analysis_status = "Not Analyzed"
+                    analysis_date = "N/A"
+
                 with st.container():
                     col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
-                    
+
                     with col1:
-                        st.write(f"📄 **{filename}**")
-                        st.caption(f"Words: {len(content.split())} | Size: {len(content)} chars")
-                    
+                        st.write(f"📄 **{doc.filename}**")
+                        st.caption(f"Words: {doc.word_count} | Size: {doc.char_count} chars")
+
                     with col2:
-                        st.write(f"**Type:** {file_type.split('/')[-1].upper()}")
-                        st.caption(f"Uploaded: {upload_date[:10]}")
-                    
+                        st.write(f"**Type:** {doc.file_type.split('/')[-1].upper()}")
+                        st.caption(f"Uploaded: {doc.upload_date[:10]}")
+
                     with col3:
                         st.write(f"**Status:** {analysis_status}")
                         if analysis_date != "N/A":
                             st.caption(f"Analyzed: {analysis_date[:10]}")
-                    
+
                     with col4:
-                        if st.button(f"📖 View", key=f"recent_view_{doc_id}"):
-                            st.session_state[f"show_details_{doc_id}"] = True
+                        if st.button(f"📖 View", key=f"recent_view_{doc.id}"):
+                            st.session_state[f"show_details_{doc.id}"] = True
                             st.rerun()
                     
                     st.divider()
@@ -428,32 +618,29 @@ elif page == "Document History":
 elif page == "Analytics Dashboard":
     st.header("📊 Analytics Dashboard")
     
-    documents = db.get_all_documents()
-    
-    if not documents:
+    if not count_documents(None):
         st.info("📊 No data available. Analyze some documents first to see analytics.")
     else:
-        # Create visualizations
-        fig_timeline, fig_types, fig_complexity = create_visualizations(documents)
+        # Create visualizations (cached until the document set changes)
+        doc_key = documents_figure_key(load_documents())
+        fig_timeline, fig_types, fig_complexity = load_visualizations(doc_key)
         
-        # Display metrics
+        # Display metrics aggregated in SQL
+        summary = load_dashboard_summary()
         col1, col2, col3, col4 = st.columns(4)
-        
+
         with col1:
-            st.metric("Total Documents", len(documents))
-        
+            st.metric("Total Documents", summary.get("total_documents", 0))
+
         with col2:
-            total_chars = sum(len(doc[4]) for doc in documents)
-            st.metric("Total Characters", f"{total_chars:,}")
-        
+            st.metric("Total Characters", f"{summary.get('total_characters', 0):,}")
+
         with col3:
-            avg_length = total_chars // len(documents) if documents else 0
-            st.metric("Avg Document Length", f"{avg_length:,}")
-        
+            st.metric("Avg Document Length", f"{summary.get('avg_length', 0):,}")
+
         with col4:
-            # Get most recent upload
-            latest_doc = max(documents, key=lambda x: x[5])
-            st.metric("Latest Upload", latest_doc[5][:10])
+            latest_upload = summary.get("latest_upload") or ""
+            st.metric("Latest Upload", latest_upload[:10])
         
         # Display charts
         st.subheader("📈 Upload Timeline")
@@ -468,7 +655,13 @@ elif page == "Analytics Dashboard":
         with col2:
             st.subheader("📊 Document Complexity")
             st.plotly_chart(fig_complexity, use_container_width=True)
-        
+
+        st.subheader("⚖️ Most Common Legal Areas")
+        st.plotly_chart(load_advanced_analytics(doc_key), use_container_width=True)
+
+        st.subheader("📋 Document Metrics Overview")
+        st.plotly_chart(load_metrics_chart(doc_key), use_container_width=True)
+
 
 # Footer
 st.sidebar.markdown("---")
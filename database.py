@@ -1,167 +1,596 @@
 import sqlite3
 import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Tuple, Optional
 
+try:
+    import orjson
+
+    def json_dumps(obj) -> str:
+        """Serialize with orjson (C-speed); decoded so columns stay TEXT."""
+        return orjson.dumps(obj).decode()
+
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+
+def analysis_cache_key(content: str, analysis_type: str, complexity_level: str) -> str:
+    """Cache key for an analysis result: hash of the exact inputs Gemini sees."""
+    raw = f"{analysis_type}|{complexity_level}|{content}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def word_count(text: str) -> int:
+    """Space-separator word count without allocating a split list.
+
+    str.count runs in C with no intermediate substrings, and the result
+    matches the SQL backfill expression in _migrate_schema.
+    """
+    return text.count(" ") + 1 if text else 0
+
+
+@dataclass(slots=True, frozen=True)
+class DocRow:
+    """One row of the list projection (Database.LIST_COLUMNS), in column order.
+
+    Attribute access in the rendering loops replaces fragile nine-way
+    positional unpacking, and slots keep the per-row footprint close to a
+    plain tuple.
+    """
+    id: int
+    filename: str
+    file_type: str
+    upload_date: str
+    word_count: int
+    char_count: int
+    analyzed: Optional[int]
+    analysis_date: Optional[str]
+    analysis: Optional[str]
+
 class Database:
     def __init__(self, db_path: str = "legal_documents.db"):
         """Initialize the database connection and create tables if they don't exist."""
         self.db_path = db_path
+        self._conn = None
+        self._write_lock = threading.Lock()
         self.init_database()
-    
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazily create and reuse a single connection for the process.
+
+        The Database instance is cached with st.cache_resource, so every
+        Streamlit rerun shares this connection instead of paying the
+        file-open and schema-parse cost on each call.
+        """
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA mmap_size=268435456")
+        return self._conn
+
+    @contextmanager
+    def _write(self, mode: str = "BEGIN"):
+        """Write transaction on the shared connection.
+
+        The analysis executor calls save_analysis/cache_analysis from
+        worker threads while the script thread stores uploads, and two
+        threads issuing BEGIN on one connection collide ("cannot start a
+        transaction within a transaction"). The lock serializes the whole
+        BEGIN...COMMIT window so each write transaction runs alone, and a
+        failed statement rolls back so the connection never gets stuck
+        inside an open transaction.
+        """
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            cursor.execute(mode)
+            try:
+                yield cursor
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
     def init_database(self):
         """Create the documents table if it doesn't exist."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename TEXT NOT NULL,
+                file_type TEXT NOT NULL,
+                upload_date TEXT NOT NULL,
+                content TEXT NOT NULL,
+                analysis TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                word_count INTEGER,
+                char_count INTEGER
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self._migrate_schema(cursor)
+
+    def _migrate_schema(self, cursor):
+        """Bring databases created by older versions up to the current schema."""
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(documents)")}
+        if "word_count" not in columns:
+            cursor.execute("ALTER TABLE documents ADD COLUMN word_count INTEGER")
+            cursor.execute("ALTER TABLE documents ADD COLUMN char_count INTEGER")
+        # Backfill counts for rows stored before the columns existed
+        cursor.execute("""
+            UPDATE documents
+            SET word_count = LENGTH(content) - LENGTH(REPLACE(content, ' ', '')) + 1,
+                char_count = LENGTH(content)
+            WHERE word_count IS NULL
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_filename
+            ON documents(filename COLLATE NOCASE)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_upload_date
+            ON documents(upload_date)
+        """)
+        # table_xinfo, not table_info: generated columns are hidden
+        columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(documents)")}
+        if "analyzed" not in columns:
+            # Virtual generated column mirroring the analysis-status logic in
+            # LIST_COLUMNS, so the unanalyzed filter can be index-backed.
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS documents (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    filename TEXT NOT NULL,
-                    file_type TEXT NOT NULL,
-                    upload_date TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    analysis TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+                ALTER TABLE documents ADD COLUMN analyzed INTEGER
+                GENERATED ALWAYS AS (
+                    CASE
+                        WHEN analysis IS NULL THEN NULL
+                        WHEN json_valid(analysis) = 0 THEN -1
+                        ELSE COALESCE(json_extract(analysis, '$.analyzed'), 0)
+                    END
+                ) VIRTUAL
             """)
-            conn.commit()
-    
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_unanalyzed
+            ON documents(analyzed) WHERE analyzed IS NOT 1
+        """)
+        # External-content FTS5 index over filename and content, kept in
+        # sync by triggers, so search is an index lookup instead of a LIKE
+        # scan over every document's text.
+        fts_exists = cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'documents_fts'
+        """).fetchone()
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts
+            USING fts5(filename, content, content='documents', content_rowid='id')
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS documents_fts_ai
+            AFTER INSERT ON documents BEGIN
+                INSERT INTO documents_fts(rowid, filename, content)
+                VALUES (new.id, new.filename, new.content);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS documents_fts_ad
+            AFTER DELETE ON documents BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, filename, content)
+                VALUES ('delete', old.id, old.filename, old.content);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS documents_fts_au
+            AFTER UPDATE ON documents BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, filename, content)
+                VALUES ('delete', old.id, old.filename, old.content);
+                INSERT INTO documents_fts(rowid, filename, content)
+                VALUES (new.id, new.filename, new.content);
+            END
+        """)
+        if not fts_exists:
+            # Index documents stored before the FTS table existed
+            cursor.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
+
+    # Shared projection for list queries. `analyzed` is the generated column
+    # added in _migrate_schema: 1/0 for analyzed/pending, -1 for corrupted
+    # JSON and NULL when no analysis exists.
+    LIST_COLUMNS = """
+        id, filename, file_type, upload_date, word_count, char_count,
+        analyzed,
+        CASE WHEN json_valid(analysis)
+            THEN json_extract(analysis, '$.analysis_date')
+        END AS analysis_date,
+        analysis
+    """
+
     def store_document(self, filename: str, content: str, analysis: dict, file_type: str) -> Optional[int]:
         """Store a document and its analysis in the database."""
         try:
             upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            analysis_json = json.dumps(analysis) if analysis else None
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            analysis_json = json_dumps(analysis) if analysis else None
+
+            with self._write() as cursor:
                 cursor.execute("""
-                    INSERT INTO documents (filename, file_type, upload_date, content, analysis)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (filename, file_type, upload_date, content, analysis_json))
-                
+                    INSERT INTO documents (filename, file_type, upload_date, content, analysis, word_count, char_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (filename, file_type, upload_date, content, analysis_json,
+                      word_count(content), len(content)))
                 doc_id = cursor.lastrowid
-                conn.commit()
-                return doc_id
-                
+            return doc_id
+
         except Exception as e:
             print(f"Error storing document: {e}")
             return None
-    
-    def get_all_documents(self) -> List[Tuple]:
-        """Retrieve all documents from the database."""
+
+    def store_documents(self, documents: List[Tuple[str, str, Optional[dict], str]]) -> List[int]:
+        """Store several documents in one transaction.
+
+        Each entry is (filename, content, analysis, file_type), mirroring
+        store_document's arguments. A single BEGIN IMMEDIATE/COMMIT wraps
+        the executemany insert so a multi-file upload pays one commit
+        instead of one per file. Returns the new document ids.
+        """
+        if not documents:
+            return []
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, filename, file_type, upload_date, content, analysis
-                    FROM documents
-                    ORDER BY upload_date DESC
-                """)
-                return cursor.fetchall()
-                
+            upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            rows = [
+                (filename, file_type, upload_date, content,
+                 json_dumps(analysis) if analysis else None,
+                 word_count(content), len(content))
+                for filename, content, analysis, file_type in documents
+            ]
+
+            with self._write("BEGIN IMMEDIATE") as cursor:
+                cursor.executemany("""
+                    INSERT INTO documents (filename, file_type, upload_date, content, analysis, word_count, char_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return list(range(last_id - len(rows) + 1, last_id + 1))
+
+        except Exception as e:
+            print(f"Error storing documents: {e}")
+            return []
+
+    def list_documents(self, unanalyzed_only: bool = False) -> List[DocRow]:
+        """List all documents without their content.
+
+        Returns DocRow records, so list views never drag full document text
+        across the SQLite boundary; fetch content lazily via
+        get_document_content(). With unanalyzed_only the filter runs
+        against the partial index on the analyzed column, returning only
+        matching rows.
+        """
+        try:
+            where = "WHERE analyzed IS NOT 1" if unanalyzed_only else ""
+            cursor = self.conn.cursor()
+            cursor.execute(f"""
+                SELECT {self.LIST_COLUMNS}
+                FROM documents
+                {where}
+                ORDER BY upload_date DESC
+            """)
+            return [DocRow(*row) for row in cursor.fetchall()]
+
         except Exception as e:
             print(f"Error retrieving documents: {e}")
             return []
-    
+
+    # Whitelisted ORDER BY clauses for get_documents_view; keys are what the
+    # UI passes, values are trusted SQL fragments.
+    ORDER_CLAUSES = {
+        "date_desc": "upload_date DESC",
+        "date_asc": "upload_date ASC",
+        "filename": "filename COLLATE NOCASE ASC",
+    }
+
+    def get_documents_view(self, search: Optional[str] = None, order: str = "date_desc",
+                           limit: Optional[int] = None, offset: int = 0) -> List[DocRow]:
+        """List documents filtered and sorted inside SQLite.
+
+        Same projection as list_documents(), but the filename filter and
+        ordering run in SQL (using the filename/upload_date indexes) so only
+        the requested rows cross into Python.
+        """
+        try:
+            order_clause = self.ORDER_CLAUSES.get(order, self.ORDER_CLAUSES["date_desc"])
+            query = f"""
+                SELECT {self.LIST_COLUMNS}
+                FROM documents
+            """
+            params = []
+            if search:
+                query += " WHERE filename LIKE ? COLLATE NOCASE"
+                params.append(f"%{search}%")
+            query += f" ORDER BY {order_clause}"
+            if limit is not None:
+                query += " LIMIT ? OFFSET ?"
+                params.extend([limit, offset])
+
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            return [DocRow(*row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            print(f"Error retrieving documents view: {e}")
+            return []
+
+    def get_content_preview(self, doc_id: int, limit: int = 500) -> str:
+        """Read just the start of a document's content.
+
+        Uses incremental blob I/O so the preview touches only the first
+        `limit` bytes instead of materializing the whole text in Python.
+        Appends an ellipsis when the content is longer than the preview.
+        """
+        try:
+            with self.conn.blobopen("documents", "content", doc_id, readonly=True) as blob:
+                truncated = len(blob) > limit
+                data = blob.read(limit)
+            # A multi-byte character may be cut at the boundary
+            text = data.decode("utf-8", errors="replace")
+            return text + "..." if truncated else text
+
+        except Exception as e:
+            print(f"Error reading preview for document {doc_id}: {e}")
+            return ""
+
+    def count_documents(self, search: Optional[str] = None) -> int:
+        """Count documents, optionally restricted to a filename search."""
+        try:
+            cursor = self.conn.cursor()
+            if search:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM documents WHERE filename LIKE ? COLLATE NOCASE",
+                    (f"%{search}%",)
+                )
+            else:
+                cursor.execute("SELECT COUNT(*) FROM documents")
+            return cursor.fetchone()[0]
+
+        except Exception as e:
+            print(f"Error counting documents: {e}")
+            return 0
+
+    def get_document_content(self, doc_id: int) -> Optional[str]:
+        """Fetch the full text of a single document."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT content FROM documents WHERE id = ?", (doc_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+        except Exception as e:
+            print(f"Error retrieving content for document {doc_id}: {e}")
+            return None
+
     def get_document_by_id(self, doc_id: int) -> Optional[Tuple]:
         """Retrieve a specific document by ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, filename, file_type, upload_date, content, analysis
-                    FROM documents
-                    WHERE id = ?
-                """, (doc_id,))
-                return cursor.fetchone()
-                
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT id, filename, file_type, upload_date, content, analysis
+                FROM documents
+                WHERE id = ?
+            """, (doc_id,))
+            return cursor.fetchone()
+
         except Exception as e:
             print(f"Error retrieving document {doc_id}: {e}")
             return None
-    
+
+    def save_analysis(self, doc_id: int, analysis: dict) -> bool:
+        """Attach an analysis result to a document.
+
+        Runs on the shared cached connection instead of opening a fresh
+        connection per save; _write() serializes it against writes from
+        other threads. Returns False when the save did not happen.
+        """
+        try:
+            with self._write() as cursor:
+                cursor.execute(
+                    "UPDATE documents SET analysis = ? WHERE id = ?",
+                    (json_dumps(analysis), doc_id)
+                )
+                updated = cursor.rowcount > 0
+            return updated
+
+        except Exception as e:
+            print(f"Error saving analysis for document {doc_id}: {e}")
+            return False
+
     def delete_document(self, doc_id: int) -> bool:
         """Delete a document from the database."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._write() as cursor:
                 cursor.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
-                conn.commit()
-                return cursor.rowcount > 0
-                
+                deleted = cursor.rowcount > 0
+            return deleted
+
         except Exception as e:
             print(f"Error deleting document {doc_id}: {e}")
             return False
-    
-    def search_documents(self, search_term: str) -> List[Tuple]:
-        """Search documents by filename or content."""
+
+    @staticmethod
+    def _fts_query(search_term: str) -> str:
+        """Build an FTS5 query from raw user input.
+
+        Each token is quoted so input can't break FTS5 query syntax, and
+        the final token gets the prefix operator so incremental typing
+        ("contr") still matches whole words ("contract").
+        """
+        tokens = [
+            '"{}"'.format(token.replace('"', '""'))
+            for token in search_term.split()
+        ]
+        if tokens:
+            tokens[-1] += "*"
+        return " ".join(tokens)
+
+    def search_documents(self, search_term: str, order: str = "date_desc",
+                         limit: Optional[int] = None, offset: int = 0) -> List[DocRow]:
+        """Full-text search over filename and content.
+
+        Matching runs against the FTS5 index, which returns only the
+        matching rowids instead of reading every document's text.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, filename, file_type, upload_date, content, analysis
-                    FROM documents
-                    WHERE filename LIKE ? OR content LIKE ?
-                    ORDER BY upload_date DESC
-                """, (f"%{search_term}%", f"%{search_term}%"))
-                return cursor.fetchall()
-                
+            order_clause = self.ORDER_CLAUSES.get(order, self.ORDER_CLAUSES["date_desc"])
+            query = f"""
+                SELECT {self.LIST_COLUMNS}
+                FROM documents
+                WHERE id IN (
+                    SELECT rowid FROM documents_fts WHERE documents_fts MATCH ?
+                )
+                ORDER BY {order_clause}
+            """
+            params = [self._fts_query(search_term)]
+            if limit is not None:
+                query += " LIMIT ? OFFSET ?"
+                params.extend([limit, offset])
+
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            return [DocRow(*row) for row in cursor.fetchall()]
+
         except Exception as e:
             print(f"Error searching documents: {e}")
             return []
-    
+
+    def count_search_results(self, search_term: str) -> int:
+        """Count documents matching a full-text search."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM documents_fts WHERE documents_fts MATCH ?",
+                (self._fts_query(search_term),)
+            )
+            return cursor.fetchone()[0]
+
+        except Exception as e:
+            print(f"Error counting search results: {e}")
+            return 0
+
     def get_document_stats(self) -> dict:
         """Get statistics about stored documents."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Total documents
-                cursor.execute("SELECT COUNT(*) FROM documents")
-                total_docs = cursor.fetchone()[0]
-                
-                # Total content length
-                cursor.execute("SELECT SUM(LENGTH(content)) FROM documents")
-                total_content = cursor.fetchone()[0] or 0
-                
-                # File type distribution
-                cursor.execute("""
-                    SELECT file_type, COUNT(*) 
-                    FROM documents 
-                    GROUP BY file_type
-                """)
-                file_types = dict(cursor.fetchall())
-                
-                # Recent uploads (last 7 days)
-                cursor.execute("""
-                    SELECT COUNT(*) FROM documents 
-                    WHERE upload_date >= date('now', '-7 days')
-                """)
-                recent_uploads = cursor.fetchone()[0]
-                
-                return {
-                    "total_documents": total_docs,
-                    "total_content_length": total_content,
-                    "file_types": file_types,
-                    "recent_uploads": recent_uploads
-                }
-                
+            cursor = self.conn.cursor()
+
+            # Total documents
+            cursor.execute("SELECT COUNT(*) FROM documents")
+            total_docs = cursor.fetchone()[0]
+
+            # Total content length
+            cursor.execute("SELECT SUM(LENGTH(content)) FROM documents")
+            total_content = cursor.fetchone()[0] or 0
+
+            # File type distribution
+            cursor.execute("""
+                SELECT file_type, COUNT(*)
+                FROM documents
+                GROUP BY file_type
+            """)
+            file_types = dict(cursor.fetchall())
+
+            # Recent uploads (last 7 days)
+            cursor.execute("""
+                SELECT COUNT(*) FROM documents
+                WHERE upload_date >= date('now', '-7 days')
+            """)
+            recent_uploads = cursor.fetchone()[0]
+
+            return {
+                "total_documents": total_docs,
+                "total_content_length": total_content,
+                "file_types": file_types,
+                "recent_uploads": recent_uploads
+            }
+
         except Exception as e:
             print(f"Error getting document stats: {e}")
             return {}
-    
+
+    def get_dashboard_summary(self) -> dict:
+        """Aggregate metrics for the Analytics Dashboard header.
+
+        One SQL query over the precomputed count columns replaces summing
+        document lengths in Python, so the dashboard header costs a few
+        bytes instead of a full-corpus scan.
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*),
+                       COALESCE(SUM(char_count), 0),
+                       COALESCE(SUM(word_count), 0),
+                       MAX(upload_date)
+                FROM documents
+            """)
+            total_docs, total_chars, total_words, latest_upload = cursor.fetchone()
+            return {
+                "total_documents": total_docs,
+                "total_characters": total_chars,
+                "total_words": total_words,
+                "avg_length": total_chars // total_docs if total_docs else 0,
+                "latest_upload": latest_upload
+            }
+
+        except Exception as e:
+            print(f"Error getting dashboard summary: {e}")
+            return {}
+
+    def get_cached_analysis(self, key: str) -> Optional[dict]:
+        """Look up a previously computed analysis by its cache key."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT response FROM analysis_cache WHERE key = ?", (key,))
+            row = cursor.fetchone()
+            return json_loads(row[0]) if row else None
+
+        except Exception as e:
+            print(f"Error reading analysis cache: {e}")
+            return None
+
+    def cache_analysis(self, key: str, analysis: dict) -> None:
+        """Persist an analysis result so re-analyzing identical content skips the API."""
+        try:
+            with self._write() as cursor:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (key, response) VALUES (?, ?)",
+                    (key, json_dumps(analysis))
+                )
+
+        except Exception as e:
+            print(f"Error writing analysis cache: {e}")
+
     def cleanup_old_documents(self, days: int = 30) -> int:
         """Remove documents older than specified days."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    DELETE FROM documents 
-                    WHERE upload_date < date('now', '-{} days')
-                """.format(days))
+            with self._write() as cursor:
+                # Bound parameter instead of .format(): keeps the statement
+                # cacheable and the interval out of the SQL text
+                cursor.execute(
+                    "DELETE FROM documents WHERE upload_date < date('now', ?)",
+                    (f"-{int(days)} days",)
+                )
                 deleted_count = cursor.rowcount
-                conn.commit()
-                return deleted_count
-                
+            return deleted_count
+
         except Exception as e:
             print(f"Error cleaning up old documents: {e}")
             return 0
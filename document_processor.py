@@ -2,14 +2,53 @@ import streamlit as st
 import PyPDF2
 import docx
 import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
+# Pages above which the PyPDF2 fallback fans extraction out to a process
+# pool; shorter documents aren't worth the worker startup cost.
+_PARALLEL_PAGE_THRESHOLD = 8
+
+_worker_reader = None
+
+# Text-cleaning helpers compiled once: a translate table deleting common
+# PDF artifacts and a whitespace-run pattern for normalization.
+_ARTIFACT_TBL = str.maketrans("", "", "\x00�")
+_WS_RE = re.compile(r"\s+")
+
+def _init_pdf_worker(pdf_bytes):
+    """Parse the PDF once per worker process and keep the reader open."""
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+
+def _extract_pdf_page(page_idx):
+    """Extract one page's text on a pool worker."""
+    return _worker_reader.pages[page_idx].extract_text()
+
 class DocumentProcessor:
     """Handles text extraction from various document formats."""
     
     def extract_text(self, uploaded_file) -> str:
         """Extract text from uploaded file based on its type."""
         try:
+            # Reject unsupported or oversize files before any parser
+            # touches the content
+            valid, message = self.validate_file(uploaded_file)
+            if not valid:
+                raise ValueError(message)
+
             file_type = uploaded_file.type
             
             if file_type == "application/pdf":
@@ -28,47 +67,84 @@ class DocumentProcessor:
     def _extract_from_pdf(self, uploaded_file) -> str:
         """Extract text from PDF file."""
         try:
-            # Read the PDF file
-            pdf_bytes = uploaded_file.read()
-            pdf_file = io.BytesIO(pdf_bytes)
-            
+            # The upload is already an in-memory seekable buffer; hand it
+            # to the parsers directly instead of copying it into a fresh
+            # bytes object plus a second BytesIO wrapper
+
+            # pypdfium2 extracts text in C and is typically an order of
+            # magnitude faster per page than PyPDF2's pure-Python parser;
+            # fall back to PyPDF2 when it's missing or rejects the file
+            if pdfium is not None:
+                try:
+                    uploaded_file.seek(0)
+                    return self._extract_with_pdfium(uploaded_file)
+                except Exception:
+                    pass
+
+            uploaded_file.seek(0)
+
             # Create PDF reader object
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            # Extract text from all pages
-            text = ""
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-            
+            pdf_reader = PyPDF2.PdfReader(uploaded_file)
+            n_pages = len(pdf_reader.pages)
+
+            # PyPDF2 page extraction is CPU-bound pure Python, so long
+            # documents are split across processes to escape the GIL; each
+            # worker parses the document once in its initializer and reuses
+            # the reader for every page it is handed.
+            cpu_count = os.cpu_count() or 1
+            if n_pages > _PARALLEL_PAGE_THRESHOLD and cpu_count > 1:
+                # Worker processes need picklable bytes, so only this path
+                # still materializes a copy of the upload
+                pdf_bytes = uploaded_file.getvalue()
+                with ProcessPoolExecutor(
+                    max_workers=min(cpu_count, n_pages),
+                    initializer=_init_pdf_worker,
+                    initargs=(pdf_bytes,)
+                ) as executor:
+                    pages = list(executor.map(_extract_pdf_page, range(n_pages)))
+            else:
+                # One join at the end keeps the assembly linear instead of
+                # recopying the text per page
+                pages = [page.extract_text() for page in pdf_reader.pages]
+            return "\n".join(pages).strip()
+
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+    def _extract_with_pdfium(self, source) -> str:
+        """Extract text from a PDF (bytes or file-like) using PDFium."""
+        pdf = pdfium.PdfDocument(source)
+        try:
+            return "\n".join(
+                page.get_textpage().get_text_range() for page in pdf
+            ).strip()
+        finally:
+            pdf.close()
     
     def _extract_from_docx(self, uploaded_file) -> str:
         """Extract text from DOCX file."""
         try:
-            # Read the DOCX file
-            docx_bytes = uploaded_file.read()
-            docx_file = io.BytesIO(docx_bytes)
-            
+            # The upload is already a seekable buffer python-docx can
+            # read directly; no intermediate bytes copy needed
+            uploaded_file.seek(0)
+
             # Create document object
-            doc = docx.Document(docx_file)
-            
+            doc = docx.Document(uploaded_file)
+
             # Extract text from all paragraphs
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        text += cell.text + " "
-                    text += "\n"
-            
-            return text.strip()
+            paras = "\n".join(paragraph.text for paragraph in doc.paragraphs)
+
+            # Most contracts have no tables; skip the nested cell walk
+            # (every cell access parses XML in python-docx) entirely then
+            if not doc.tables:
+                return paras.strip()
+
+            table_parts = "\n".join(
+                " ".join(cell.text for cell in row.cells)
+                for table in doc.tables
+                for row in table.rows
+            )
+            return (paras + "\n" + table_parts).strip()
             
         except Exception as e:
             raise Exception(f"Failed to extract text from DOCX: {str(e)}")
@@ -81,15 +157,29 @@ class DocumentProcessor:
             
             # Decode bytes to string
             if isinstance(content, bytes):
+                # Fast path: most uploads are already valid UTF-8
+                try:
+                    return content.decode('utf-8').strip()
+                except UnicodeDecodeError:
+                    pass
+
+                # Detect the encoding once on a small prefix and decode a
+                # single time, instead of trial-decoding the whole file
+                # against every candidate encoding
+                if charset_normalizer is not None:
+                    match = charset_normalizer.from_bytes(content[:65536]).best()
+                    if match is not None and match.encoding:
+                        return content.decode(match.encoding, errors='replace').strip()
+
                 # Try different encodings
-                encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+                encodings = ['latin-1', 'cp1252', 'iso-8859-1']
                 for encoding in encodings:
                     try:
                         text = content.decode(encoding)
                         return text.strip()
                     except UnicodeDecodeError:
                         continue
-                
+
                 # If all encodings fail, use utf-8 with error handling
                 text = content.decode('utf-8', errors='replace')
                 return text.strip()
@@ -133,15 +223,9 @@ class DocumentProcessor:
         """Clean and preprocess extracted text."""
         if not text:
             return ""
-        
-        # Remove excessive whitespace
-        text = " ".join(text.split())
-        
-        # Remove common PDF artifacts
-        text = text.replace("\x00", "")  # Null characters
-        text = text.replace("\ufffd", "")  # Replacement characters
-        
-        # Basic cleaning
-        text = text.strip()
-        
-        return text
+
+        # Remove common PDF artifacts in one translate pass (a no-op
+        # costs nothing extra), then collapse whitespace runs with the
+        # compiled pattern instead of a full split-and-rejoin
+        text = text.translate(_ARTIFACT_TBL)
+        return _WS_RE.sub(" ", text).strip()
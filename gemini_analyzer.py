@@ -1,24 +1,109 @@
 import os
 import json
+import asyncio
+import hashlib
 import logging
+import re
+import numpy as np
 from typing import Dict, List, Optional
 from google import genai
 from google.genai import types
 
+# Section headers recognized in a free-form analysis response. One pass of
+# the compiled pattern over the whole text replaces the per-line substring
+# scans (and the str.upper allocation per line) of the old parser.
+_SECTION_RE = re.compile(
+    r"^.*?\b(DOCUMENT SUMMARY|SUMMARY|KEY POINTS|MAIN POINTS|"
+    r"LEGAL INSIGHTS|INSIGHTS|SIMPLIFIED|PLAIN ENGLISH|"
+    r"RECOMMENDATIONS|SUGGESTIONS)\b",
+    re.IGNORECASE | re.MULTILINE
+)
+
+_SECTION_KEYS = {
+    "DOCUMENT SUMMARY": "summary",
+    "SUMMARY": "summary",
+    "KEY POINTS": "key_points",
+    "MAIN POINTS": "key_points",
+    "LEGAL INSIGHTS": "insights",
+    "INSIGHTS": "insights",
+    "SIMPLIFIED": "simplified",
+    "PLAIN ENGLISH": "simplified",
+    "RECOMMENDATIONS": "recommendations",
+    "SUGGESTIONS": "recommendations",
+}
+
+# Insight extractors for the fallback parser, compiled once; each line is
+# classified with a single match instead of repeated lower()/isdigit scans.
+_COMPLEXITY_RE = re.compile(r"complexity[^0-9]*(\d+)", re.IGNORECASE)
+_AREA_RE = re.compile(r"\b(?:legal\s+)?areas?\b\s*[:\-]\s*(.+)", re.IGNORECASE)
+_SENTIMENT_RE = re.compile(r"\b(?:sentiment|tone)\b(?:\s*[:\-]\s*(.+))?", re.IGNORECASE)
+
+# Response schema for single-document analysis; constraining decoding to
+# JSON makes parsing a single json.loads instead of free-text scanning.
+_ANALYSIS_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "summary": types.Schema(type=types.Type.STRING),
+        "key_points": types.Schema(
+            type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)
+        ),
+        "insights": types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "complexity_score": types.Schema(type=types.Type.INTEGER),
+                "legal_areas": types.Schema(
+                    type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)
+                ),
+                "sentiment": types.Schema(type=types.Type.STRING),
+            },
+        ),
+        "simplified_explanation": types.Schema(type=types.Type.STRING),
+        "recommendations": types.Schema(
+            type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)
+        ),
+    },
+    required=["summary", "key_points", "insights",
+              "simplified_explanation", "recommendations"],
+)
+
+_ANALYSIS_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=_ANALYSIS_SCHEMA,
+)
+
 class GeminiAnalyzer:
     """Handles legal document analysis using Google Gemini AI."""
-    
+
+    # In-process result cache size; entries are evicted oldest-first
+    _CACHE_MAX_ENTRIES = 128
+
     def __init__(self):
         """Initialize the Gemini client."""
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable not found")
-        
+
         self.client = genai.Client(api_key=api_key)
         self.model = "gemini-2.5-flash"
+        self._result_cache = {}
+
+    def _cache_key(self, kind: str, text: str, *extra: str) -> str:
+        """Key a result by request kind, text hash and request options."""
+        digest = hashlib.sha256(text.encode()).hexdigest()[:16]
+        return "|".join((self.model, kind, digest) + extra)
+
+    def _cache_put(self, key: str, value) -> None:
+        if len(self._result_cache) >= self._CACHE_MAX_ENTRIES:
+            self._result_cache.pop(next(iter(self._result_cache)))
+        self._result_cache[key] = value
     
     def analyze_document(self, text: str, analysis_type: str, complexity_level: str) -> Dict:
         """Perform comprehensive legal document analysis."""
+        cache_key = self._cache_key("analysis", text, analysis_type, complexity_level)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             # Create analysis prompt based on type and complexity
             prompt = self._create_analysis_prompt(text, analysis_type, complexity_level)
@@ -26,7 +111,8 @@ class GeminiAnalyzer:
             # Generate analysis
             response = self.client.models.generate_content(
                 model=self.model,
-                contents=prompt
+                contents=prompt,
+                config=_ANALYSIS_CONFIG
             )
             
             if not response.text:
@@ -34,7 +120,8 @@ class GeminiAnalyzer:
             
             # Parse the response and structure the results
             analysis_result = self._parse_analysis_response(response.text, text)
-            
+
+            self._cache_put(cache_key, analysis_result)
             return analysis_result
             
         except Exception as e:
@@ -47,6 +134,271 @@ class GeminiAnalyzer:
                 "recommendations": []
             }
     
+    async def analyze_document_async(self, text: str, analysis_type: str, complexity_level: str) -> Dict:
+        """Async variant of analyze_document for concurrent batch analysis.
+
+        Retries with exponential backoff when the API reports quota
+        exhaustion, since concurrent dispatch makes rate limits more likely.
+        """
+        cache_key = self._cache_key("analysis", text, analysis_type, complexity_level)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            prompt = self._create_analysis_prompt(text, analysis_type, complexity_level)
+
+            response = None
+            for attempt in range(3):
+                try:
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                        config=_ANALYSIS_CONFIG
+                    )
+                    break
+                except Exception as e:
+                    if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
+                        await asyncio.sleep(10 * 2 ** attempt)
+                    else:
+                        raise
+
+            if response is None or not response.text:
+                raise Exception("Empty response from Gemini API")
+
+            analysis_result = self._parse_analysis_response(response.text, text)
+            self._cache_put(cache_key, analysis_result)
+            return analysis_result
+
+        except Exception as e:
+            logging.error(f"Error in document analysis: {e}")
+            return {
+                "error": str(e),
+                "summary": "Analysis failed due to an error.",
+                "key_points": [],
+                "insights": {},
+                "recommendations": []
+            }
+
+    async def get_document_summary_async(self, text: str) -> str:
+        """Async variant of get_document_summary."""
+        cache_key = self._cache_key("summary", text)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=self._summary_prompt(text)
+            )
+
+            summary = response.text or "Summary not available"
+            self._cache_put(cache_key, summary)
+            return summary
+
+        except Exception as e:
+            return f"Error generating summary: {str(e)}"
+
+    async def extract_key_entities_async(self, text: str) -> List[str]:
+        """Async variant of extract_key_entities."""
+        cache_key = self._cache_key("entities", text)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=self._entities_prompt(text)
+            )
+
+            entities = self._parse_entities(response.text)
+            if entities:
+                self._cache_put(cache_key, entities)
+            return entities
+
+        except Exception as e:
+            logging.error(f"Error extracting entities: {e}")
+            return []
+
+    async def analyze_all(self, text: str, analysis_type: str, complexity_level: str,
+                          include_entities: bool = True) -> Dict:
+        """Run analysis, quick summary and entity extraction as one batch.
+
+        The calls are independent and network-bound, so gathering them
+        makes the combined wall-clock cost that of the slowest call
+        instead of the sum. Summary and entities are attached to the
+        analysis dict as quick_summary / entities.
+        """
+        tasks = [
+            self.analyze_document_async(text, analysis_type, complexity_level),
+            self.get_document_summary_async(text),
+        ]
+        if include_entities:
+            tasks.append(self.extract_key_entities_async(text))
+
+        results = await asyncio.gather(*tasks)
+        analysis = results[0]
+        if "error" not in analysis:
+            analysis["quick_summary"] = results[1]
+            if include_entities:
+                analysis["entities"] = results[2]
+        return analysis
+
+    # Combined document text per batched request; leaves headroom under
+    # the 8000-character budget used for single-document prompts
+    _BATCH_CHAR_LIMIT = 6000
+
+    def _pack_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group document indices into batches under the character budget.
+
+        Packing small documents into shared requests amortizes the fixed
+        per-request overhead (connection, auth, prompt preamble tokens).
+        A document larger than the budget gets a batch of its own.
+        """
+        batches = []
+        current, current_size = [], 0
+        for i, text in enumerate(texts):
+            size = min(len(text), self._BATCH_CHAR_LIMIT)
+            if current and current_size + size > self._BATCH_CHAR_LIMIT:
+                batches.append(current)
+                current, current_size = [], 0
+            current.append(i)
+            current_size += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_analysis_prompt(self, texts: List[str], analysis_type: str,
+                               complexity_level: str) -> str:
+        """Prompt asking for one JSON analysis object per packed document."""
+        sections = "\n\n".join(
+            f"===DOC_BOUNDARY_{i}===\n{self._snippet(text, self._BATCH_CHAR_LIMIT)}"
+            for i, text in enumerate(texts)
+        )
+        return f"""
+        You are an expert legal analyst. Analyze EACH of the {len(texts)} legal documents below.
+
+        Analysis Type: {analysis_type}
+        Detail Level: {complexity_level}
+
+        The documents are separated by ===DOC_BOUNDARY_<index>=== markers:
+
+        {sections}
+
+        Return ONLY a JSON array with exactly {len(texts)} objects, one per
+        document in order. Each object must have the keys:
+        "summary" (string), "key_points" (list of strings),
+        "insights" (object with "complexity_score" (integer 1-10),
+        "legal_areas" (list of strings) and "sentiment" (string)),
+        "simplified_explanation" (string), "recommendations" (list of strings).
+        """
+
+    async def _analyze_batch_async(self, texts: List[str], analysis_type: str,
+                                   complexity_level: str) -> List[Dict]:
+        """Analyze one packed batch with a single Gemini request."""
+        if len(texts) == 1:
+            return [await self.analyze_document_async(texts[0], analysis_type, complexity_level)]
+
+        try:
+            prompt = self._batch_analysis_prompt(texts, analysis_type, complexity_level)
+
+            response = None
+            for attempt in range(3):
+                try:
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                        config=types.GenerateContentConfig(
+                            response_mime_type="application/json"
+                        )
+                    )
+                    break
+                except Exception as e:
+                    if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
+                        await asyncio.sleep(10 * 2 ** attempt)
+                    else:
+                        raise
+
+            if response is None or not response.text:
+                raise Exception("Empty response from Gemini API")
+
+            parsed = json.loads(response.text)
+            if not isinstance(parsed, list) or len(parsed) != len(texts):
+                raise Exception(
+                    f"Expected {len(texts)} analyses, got {len(parsed) if isinstance(parsed, list) else type(parsed)}"
+                )
+
+            results = []
+            for text, item in zip(texts, parsed):
+                item["raw_analysis"] = json.dumps(item)
+                if not item.get("insights"):
+                    item["insights"] = self._generate_basic_insights(text)
+                self._cache_put(
+                    self._cache_key("analysis", text, analysis_type, complexity_level),
+                    item
+                )
+                results.append(item)
+            return results
+
+        except Exception as e:
+            # A malformed batch response shouldn't fail every document in
+            # it; retry the batch as individual requests
+            logging.error(f"Batch analysis failed, retrying per document: {e}")
+            return list(await asyncio.gather(*(
+                self.analyze_document_async(text, analysis_type, complexity_level)
+                for text in texts
+            )))
+
+    async def analyze_documents_async(self, texts: List[str], analysis_type: str,
+                                      complexity_level: str, max_concurrency: int = 5) -> List[Dict]:
+        """Analyze several documents concurrently in packed batches.
+
+        Small documents share one request each batch, and the batches are
+        network-bound, so fanning them out with asyncio.gather makes
+        wall-clock time roughly the slowest single call instead of the
+        sum. Concurrency is capped with a semaphore to stay under the
+        API's requests-per-minute limit.
+        """
+        batches = self._pack_batches(texts)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def analyze_batch(indices):
+            async with semaphore:
+                return await self._analyze_batch_async(
+                    [texts[i] for i in indices], analysis_type, complexity_level
+                )
+
+        batch_results = await asyncio.gather(*(analyze_batch(batch) for batch in batches))
+
+        results = [None] * len(texts)
+        for indices, batch in zip(batches, batch_results):
+            for i, result in zip(indices, batch):
+                results[i] = result
+        return results
+
+    def analyze_documents(self, texts: List[str], analysis_type: str,
+                          complexity_level: str) -> List[Dict]:
+        """Synchronous wrapper over the batched concurrent analysis path."""
+        return asyncio.run(self.analyze_documents_async(texts, analysis_type, complexity_level))
+
+    @staticmethod
+    def _snippet(text: str, limit: int) -> str:
+        """Slice a prompt excerpt, preferring a sentence boundary.
+
+        Cutting at the last sentence end inside the limit (as long as
+        that keeps most of the budget) stops the model spending tokens
+        on a dangling partial sentence.
+        """
+        if len(text) <= limit:
+            return text
+        snippet = text[:limit]
+        cut = snippet.rfind(". ")
+        if cut > limit * 3 // 4:
+            snippet = snippet[:cut + 1]
+        return snippet
+
     def _create_analysis_prompt(self, text: str, analysis_type: str, complexity_level: str) -> str:
         """Create a detailed prompt for legal document analysis."""
         
@@ -57,7 +409,7 @@ class GeminiAnalyzer:
         Detail Level: {complexity_level}
         
         Document Text:
-        {text[:8000]}  # Limit text to avoid token limits
+        {self._snippet(text, 8000)}
         
         Please provide a comprehensive analysis including:
         
@@ -76,7 +428,10 @@ class GeminiAnalyzer:
         
         5. RECOMMENDATIONS: Suggest actions or considerations for the reader
         
-        Please format your response clearly with headers and bullet points where appropriate.
+        Return ONLY a JSON object with the keys "summary" (string),
+        "key_points" (list of strings), "insights" (object with
+        "complexity_score", "legal_areas" and "sentiment"),
+        "simplified_explanation" (string) and "recommendations" (list of strings).
         Make sure your analysis is practical and actionable.
         """
         
@@ -104,8 +459,25 @@ class GeminiAnalyzer:
         return base_prompt
     
     def _parse_analysis_response(self, response_text: str, original_text: str) -> Dict:
-        """Parse and structure the Gemini response into organized data."""
-        
+        """Structure the Gemini response: one json.loads in the common case.
+
+        The analysis requests constrain decoding with a JSON response
+        schema, so parsing normally costs a single json.loads; the regex
+        section parser only runs if the model still returned free text.
+        """
+        try:
+            result = json.loads(response_text)
+        except json.JSONDecodeError:
+            return self._fallback_parse(response_text, original_text)
+
+        result["raw_analysis"] = response_text
+        if not result.get("insights"):
+            result["insights"] = self._generate_basic_insights(original_text)
+        return result
+
+    def _fallback_parse(self, response_text: str, original_text: str) -> Dict:
+        """Section-scan a free-text response that wasn't valid JSON."""
+
         # Initialize result structure
         result = {
             "summary": "",
@@ -116,47 +488,25 @@ class GeminiAnalyzer:
             "raw_analysis": response_text
         }
         
-        # Extract different sections from the response
-        lines = response_text.split('\n')
-        current_section = None
-        current_content = []
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Identify section headers
-            if any(header in line.upper() for header in ['SUMMARY', 'DOCUMENT SUMMARY']):
-                if current_section and current_content:
-                    self._process_section(result, current_section, current_content)
-                current_section = "summary"
-                current_content = []
-            elif any(header in line.upper() for header in ['KEY POINTS', 'MAIN POINTS']):
-                if current_section and current_content:
-                    self._process_section(result, current_section, current_content)
-                current_section = "key_points"
-                current_content = []
-            elif any(header in line.upper() for header in ['INSIGHTS', 'LEGAL INSIGHTS']):
-                if current_section and current_content:
-                    self._process_section(result, current_section, current_content)
-                current_section = "insights"
-                current_content = []
-            elif any(header in line.upper() for header in ['SIMPLIFIED', 'PLAIN ENGLISH']):
-                if current_section and current_content:
-                    self._process_section(result, current_section, current_content)
-                current_section = "simplified"
-                current_content = []
-            elif any(header in line.upper() for header in ['RECOMMENDATIONS', 'SUGGESTIONS']):
-                if current_section and current_content:
-                    self._process_section(result, current_section, current_content)
-                current_section = "recommendations"
-                current_content = []
-            elif line and not line.startswith('#'):
-                current_content.append(line)
-        
-        # Process the last section
-        if current_section and current_content:
-            self._process_section(result, current_section, current_content)
-        
+        # One finditer pass locates every section header; the text between
+        # consecutive headers is that section's body
+        matches = list(_SECTION_RE.finditer(response_text))
+        for match, next_match in zip(matches, matches[1:] + [None]):
+            section = _SECTION_KEYS[match.group(1).upper()]
+
+            # Body starts on the line after the header and runs to the
+            # next header (or the end of the response)
+            line_end = response_text.find('\n', match.end())
+            start = line_end + 1 if line_end != -1 else len(response_text)
+            end = next_match.start() if next_match else len(response_text)
+
+            content = [
+                line.strip() for line in response_text[start:end].splitlines()
+                if line.strip() and not line.lstrip().startswith('#')
+            ]
+            if content:
+                self._process_section(result, section, content)
+
         # Add basic insights if not extracted
         if not result["insights"]:
             result["insights"] = self._generate_basic_insights(original_text)
@@ -181,23 +531,26 @@ class GeminiAnalyzer:
             result["key_points"] = [p.strip() for p in points if p.strip()]
         
         elif section == "insights":
-            # Parse insights for structured data
+            # Parse insights for structured data; one regex match per
+            # line classifies it
             insights = {}
             for line in content:
-                if 'complexity' in line.lower() and any(char.isdigit() for char in line):
-                    # Extract complexity score
-                    for char in line:
-                        if char.isdigit():
-                            insights["complexity_score"] = int(char)
-                            break
-                
-                if 'legal area' in line.lower() or 'area' in line.lower():
-                    areas = [area.strip() for area in line.split(',') if area.strip()]
-                    insights["legal_areas"] = areas
-                
-                if 'sentiment' in line.lower() or 'tone' in line.lower():
-                    insights["sentiment"] = line.split(':')[-1].strip() if ':' in line else "Neutral"
-            
+                match = _COMPLEXITY_RE.search(line)
+                if match:
+                    insights["complexity_score"] = int(match.group(1))
+                    continue
+
+                match = _AREA_RE.search(line)
+                if match:
+                    insights["legal_areas"] = [
+                        area.strip() for area in match.group(1).split(',') if area.strip()
+                    ]
+                    continue
+
+                match = _SENTIMENT_RE.search(line)
+                if match:
+                    insights["sentiment"] = (match.group(1) or "Neutral").strip()
+
             result["insights"] = insights
         
         elif section == "simplified":
@@ -215,11 +568,16 @@ class GeminiAnalyzer:
     
     def _generate_basic_insights(self, text: str) -> Dict:
         """Generate basic insights about the document."""
-        word_count = len(text.split())
+        word_count = text.count(' ') + 1 if text else 0
         char_count = len(text)
-        
+
+        # Count uppercase letters in C over the ASCII bytes instead of a
+        # per-character Python loop with an intermediate list
+        ascii_bytes = np.frombuffer(text.encode('ascii', 'ignore'), dtype=np.uint8)
+        upper_count = int(((ascii_bytes >= 65) & (ascii_bytes <= 90)).sum())
+
         # Simple complexity estimation
-        complexity_score = min(10, max(1, word_count // 500 + len([c for c in text if c.isupper()]) // 100))
+        complexity_score = min(10, max(1, word_count // 500 + upper_count // 100))
         
         return {
             "word_count": word_count,
@@ -229,50 +587,72 @@ class GeminiAnalyzer:
             "estimated_reading_time": f"{word_count // 200 + 1} minutes"
         }
     
-    def get_document_summary(self, text: str) -> str:
-        """Get a quick summary of the document."""
-        try:
-            prompt = f"""
+    def _summary_prompt(self, text: str) -> str:
+        """Prompt for the quick 2-3 sentence summary."""
+        return f"""
             Please provide a concise summary of this legal document in 2-3 sentences:
-            
-            {text[:4000]}
-            
+
+            {self._snippet(text, 4000)}
+
             Focus on the document's main purpose and key provisions.
             """
-            
+
+    def _entities_prompt(self, text: str) -> str:
+        """Prompt for key entity extraction."""
+        return f"""
+            Extract the key legal entities, important dates, and critical terms from this legal document.
+            Return them as a simple list:
+
+            {self._snippet(text, 4000)}
+
+            Focus on: parties involved, important dates, key legal terms, amounts, deadlines.
+            """
+
+    @staticmethod
+    def _parse_entities(response_text: Optional[str]) -> List[str]:
+        """Parse an entity-list response into at most 20 entries."""
+        if not response_text:
+            return []
+        entities = [line.strip().lstrip('-•* ') for line in response_text.split('\n') if line.strip()]
+        return entities[:20]  # Limit to 20 entities
+
+    def get_document_summary(self, text: str) -> str:
+        """Get a quick summary of the document."""
+        cache_key = self._cache_key("summary", text)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
             response = self.client.models.generate_content(
                 model=self.model,
-                contents=prompt
+                contents=self._summary_prompt(text)
             )
-            
-            return response.text or "Summary not available"
-            
+
+            summary = response.text or "Summary not available"
+            self._cache_put(cache_key, summary)
+            return summary
+
         except Exception as e:
             return f"Error generating summary: {str(e)}"
     
     def extract_key_entities(self, text: str) -> List[str]:
         """Extract key legal entities and terms from the document."""
+        cache_key = self._cache_key("entities", text)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            prompt = f"""
-            Extract the key legal entities, important dates, and critical terms from this legal document.
-            Return them as a simple list:
-            
-            {text[:4000]}
-            
-            Focus on: parties involved, important dates, key legal terms, amounts, deadlines.
-            """
-            
             response = self.client.models.generate_content(
                 model=self.model,
-                contents=prompt
+                contents=self._entities_prompt(text)
             )
-            
-            if response.text:
-                # Parse the response into a list
-                entities = [line.strip().lstrip('-•* ') for line in response.text.split('\n') if line.strip()]
-                return entities[:20]  # Limit to 20 entities
-            
-            return []
+
+            entities = self._parse_entities(response.text)
+            if entities:
+                self._cache_put(cache_key, entities)
+            return entities
             
         except Exception as e:
             logging.error(f"Error extracting entities: {e}")
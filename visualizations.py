@@ -1,43 +1,75 @@
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from collections import Counter
 import json
 
-def create_visualizations(documents):
-    """Create various visualizations for the document analytics dashboard."""
-    
-    # Prepare data
-    df_data = []
+def _build_frame(documents):
+    """Build the dataframe shared by every chart builder.
+
+    One pass over the rows parses each document's analysis JSON exactly
+    once and carries every column the charts need, so the builders stop
+    running their own per-document parse loops.
+    """
+    # Parse analysis if available
+    parsed = []
     for doc in documents:
-        doc_id, filename, file_type, upload_date, content, analysis = doc
-        
-        # Parse analysis if available
         analysis_data = {}
-        if analysis:
+        if doc.analysis:
             try:
-                analysis_data = json.loads(analysis)
+                analysis_data = json.loads(doc.analysis)
             except json.JSONDecodeError:
                 pass
-        
-        df_data.append({
-            'id': doc_id,
-            'filename': filename,
-            'file_type': file_type,
-            'upload_date': upload_date,
-            'content_length': len(content),
-            'word_count': len(content.split()),
-            'complexity_score': analysis_data.get('insights', {}).get('complexity_score', 5)
-        })
-    
-    df = pd.DataFrame(df_data)
-    
-    # Convert upload_date to datetime
-    df['upload_date'] = pd.to_datetime(df['upload_date'])
-    df['upload_day'] = df['upload_date'].dt.date
-    
+        parsed.append(analysis_data)
+
+    df = pd.DataFrame({
+        'id': [doc.id for doc in documents],
+        'filename': [doc.filename for doc in documents],
+        # Category dtype: a handful of MIME types repeated across rows
+        'file_type': pd.Categorical([doc.file_type for doc in documents]),
+        'upload_date': [doc.upload_date for doc in documents],
+        'content_length': [doc.char_count for doc in documents],
+        'word_count': [doc.word_count for doc in documents],
+    })
+    if df.empty:
+        return df
+
+    # Flatten the parsed insights in one json_normalize pass instead of
+    # chained .get lookups per row
+    flat = pd.json_normalize(parsed, max_level=2)
+
+    if 'insights.complexity_score' in flat.columns:
+        df['complexity_score'] = flat['insights.complexity_score'].fillna(5).astype('int8')
+    else:
+        df['complexity_score'] = pd.Series(5, index=df.index, dtype='int8')
+
+    if 'insights.legal_areas' in flat.columns:
+        df['legal_areas'] = [
+            areas if isinstance(areas, list) else []
+            for areas in flat['insights.legal_areas']
+        ]
+    else:
+        df['legal_areas'] = [[] for _ in range(len(df))]
+
+    if 'insights.sentiment' in flat.columns:
+        df['sentiment'] = flat['insights.sentiment']
+    else:
+        df['sentiment'] = None
+
+    # Convert upload_date once, with an explicit format so pandas skips
+    # per-value format inference, and derive the groupers used by the
+    # timeline and trend charts
+    df['upload_date'] = pd.to_datetime(df['upload_date'], format="%Y-%m-%d %H:%M:%S", cache=True)
+    df['upload_day'] = df['upload_date'].dt.normalize()
+    df['month'] = df['upload_date'].dt.to_period('M').astype(str)
+    return df
+
+def create_visualizations(documents):
+    """Create various visualizations for the document analytics dashboard."""
+
+    df = _build_frame(documents)
+
     # Create timeline chart
     fig_timeline = create_upload_timeline(df)
     
@@ -52,10 +84,16 @@ def create_visualizations(documents):
 def create_upload_timeline(df):
     """Create a timeline chart showing document uploads over time."""
     
-    # Group by day and count uploads
+    # Group by day and count uploads; upload_day is already datetime64
     daily_uploads = df.groupby('upload_day').size().reset_index(name='count')
-    daily_uploads['upload_day'] = pd.to_datetime(daily_uploads['upload_day'])
-    
+
+    # Long histories are pre-aggregated to weeks so the figure ships a
+    # bounded number of points to the browser
+    if len(daily_uploads) > 500:
+        daily_uploads = (
+            daily_uploads.set_index('upload_day').resample('W').sum().reset_index()
+        )
+
     # Create line chart
     fig = px.line(
         daily_uploads, 
@@ -141,46 +179,33 @@ def create_complexity_chart(df):
 
 def create_document_metrics_chart(documents):
     """Create a comprehensive metrics dashboard."""
-    
-    # Prepare data
-    df_data = []
-    for doc in documents:
-        doc_id, filename, file_type, upload_date, content, analysis = doc
-        
-        analysis_data = {}
-        if analysis:
-            try:
-                analysis_data = json.loads(analysis)
-            except json.JSONDecodeError:
-                pass
-        
-        df_data.append({
-            'filename': filename[:20] + '...' if len(filename) > 20 else filename,
-            'word_count': len(content.split()),
-            'complexity': analysis_data.get('insights', {}).get('complexity_score', 5),
-            'upload_date': upload_date
-        })
-    
-    df = pd.DataFrame(df_data)
-    
+
+    df = _build_frame(documents)
+    df['filename'] = [
+        name[:20] + '...' if len(name) > 20 else name
+        for name in df['filename']
+    ]
+
     # Create subplots
     fig = make_subplots(
         rows=2, cols=2,
         subplot_titles=('Word Count by Document', 'Complexity vs Word Count', 
                        'Recent Activity', 'Document Size Distribution'),
         specs=[[{"type": "bar"}, {"type": "scatter"}],
-               [{"type": "bar"}, {"type": "histogram"}]]
+               [{"type": "bar"}, {"type": "bar"}]]
     )
-    
-    # Word count bar chart
+
+    # Word count bar chart; only the 50 largest documents are drawn so
+    # the trace stays bounded on big collections
+    bars = df.nlargest(50, 'word_count') if len(df) > 50 else df
     fig.add_trace(
-        go.Bar(x=df['filename'], y=df['word_count'], name='Word Count'),
+        go.Bar(x=bars['filename'], y=bars['word_count'], name='Word Count'),
         row=1, col=1
     )
     
     # Complexity vs Word Count scatter
     fig.add_trace(
-        go.Scatter(x=df['word_count'], y=df['complexity'], 
+        go.Scatter(x=df['word_count'], y=df['complexity_score'],
                   mode='markers', name='Complexity vs Words',
                   marker=dict(size=10, opacity=0.7)),
         row=1, col=2
@@ -194,9 +219,13 @@ def create_document_metrics_chart(documents):
         row=2, col=1
     )
     
-    # Document size distribution
+    # Document size distribution, binned server-side so the figure
+    # carries ten bin counts instead of every raw value
+    counts, edges = np.histogram(df['word_count'], bins=10)
+    centers = (edges[:-1] + edges[1:]) / 2
     fig.add_trace(
-        go.Histogram(x=df['word_count'], name='Size Distribution', nbinsx=10),
+        go.Bar(x=centers, y=counts, width=np.diff(edges),
+               name='Size Distribution'),
         row=2, col=2
     )
     
@@ -207,41 +236,20 @@ def create_document_metrics_chart(documents):
 def create_advanced_analytics(documents):
     """Create advanced analytics charts for legal document insights."""
     
-    # Extract analysis data
-    complexity_scores = []
-    legal_areas = []
-    sentiment_scores = []
-    
-    for doc in documents:
-        _, _, _, _, _, analysis = doc
-        
-        if analysis:
-            try:
-                analysis_data = json.loads(analysis)
-                insights = analysis_data.get('insights', {})
-                
-                # Complexity scores
-                if 'complexity_score' in insights:
-                    complexity_scores.append(insights['complexity_score'])
-                
-                # Legal areas
-                if 'legal_areas' in insights:
-                    legal_areas.extend(insights['legal_areas'])
-                
-                # Sentiment (if available)
-                if 'sentiment' in insights:
-                    sentiment_scores.append(insights['sentiment'])
-                    
-            except json.JSONDecodeError:
-                continue
-    
+    df = _build_frame(documents)
+
+    # Flatten and count areas with C-level hash aggregation, keeping only
+    # the 20 most common so the chart stays readable on large corpora
+    if df.empty:
+        area_counts = pd.Series(dtype=object)
+    else:
+        area_counts = df['legal_areas'].explode().dropna().value_counts().head(20)
+
     # Create legal areas frequency chart
-    if legal_areas:
-        area_counts = Counter(legal_areas)
-        
+    if not area_counts.empty:
         fig_areas = px.bar(
-            x=list(area_counts.values()),
-            y=list(area_counts.keys()),
+            x=area_counts.values,
+            y=area_counts.index,
             orientation='h',
             title='Most Common Legal Areas',
             labels={'x': 'Frequency', 'y': 'Legal Areas'}
@@ -258,23 +266,9 @@ def create_advanced_analytics(documents):
 
 def create_trend_analysis(documents):
     """Create trend analysis showing document patterns over time."""
-    
-    # Prepare monthly data
-    df_data = []
-    for doc in documents:
-        doc_id, filename, file_type, upload_date, content, analysis = doc
-        
-        upload_dt = datetime.strptime(upload_date, "%Y-%m-%d %H:%M:%S")
-        month_year = upload_dt.strftime("%Y-%m")
-        
-        df_data.append({
-            'month': month_year,
-            'word_count': len(content.split()),
-            'file_type': file_type
-        })
-    
-    df = pd.DataFrame(df_data)
-    
+
+    df = _build_frame(documents)
+
     # Monthly document count and average length
     monthly_stats = df.groupby('month').agg({
         'word_count': ['count', 'mean']